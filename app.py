@@ -1,11 +1,25 @@
 import streamlit as st
+import streamlit.components.v1 as components
 import fitz  # PyMuPDF
 import edge_tts
 import asyncio
 import io
 import re
+import base64
 import time
 import sys
+import os
+import json
+import hashlib
+import tempfile
+import threading
+import zipfile
+import posixpath
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from importlib.metadata import version, PackageNotFoundError
+from urllib.parse import unquote
 
 # Fix asyncio issues on Windows
 if sys.platform == "win32":
@@ -57,6 +71,76 @@ def get_supabase():
 
 supabase = get_supabase()
 
+# --- Local Storage (stand-in for Supabase storage) ---
+class LocalStorage:
+    """Directory-backed storage with the same from_(bucket) API as supabase.storage."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def from_(self, bucket):
+        return LocalBucket(os.path.join(self.root, bucket))
+
+class LocalBucket:
+    """One bucket of LocalStorage; mirrors the Supabase bucket methods used here."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def _file(self, name):
+        return os.path.join(self.path, *name.split('/'))
+
+    def upload(self, path, file, file_options=None):
+        target = self._file(path)
+        upsert = str((file_options or {}).get('upsert', 'false')).lower() == 'true'
+        if os.path.exists(target) and not upsert:
+            raise FileExistsError(f"The resource already exists: {path}")
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # Write to a temp file and swap it in so readers never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target), prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(file)
+            os.replace(tmp, target)
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        return {'Key': path}
+
+    def download(self, path):
+        with open(self._file(path), 'rb') as f:
+            return f.read()
+
+    def list(self, path=None):
+        folder = self._file(path) if path else self.path
+        if not os.path.isdir(folder):
+            return []
+        return [{'name': name} for name in sorted(os.listdir(folder)) if not name.startswith('.')]
+
+    def remove(self, paths):
+        removed = []
+        for path in paths:
+            try:
+                os.remove(self._file(path))
+                removed.append({'name': path})
+            except FileNotFoundError:
+                pass
+        return removed
+
+AUDIO_STORE_DIR = get_secret("AUDIO_STORE_DIR")
+
+@st.cache_resource
+def get_audio_store():
+    """Storage for shared synthesized audio: Supabase if connected, else a local folder if configured."""
+    if supabase:
+        return supabase.storage
+    if AUDIO_STORE_DIR:
+        return LocalStorage(AUDIO_STORE_DIR)
+    return None
+
+audio_store = get_audio_store()
+
 # --- CSS ---
 st.markdown("""
 <style>
@@ -106,6 +190,9 @@ st.markdown("""
         border-bottom-right-radius: 8px;
     }
 
+    /* Hidden trigger clicked by the continuous player */
+    .st-key-continuous_advance {display: none;}
+
     /* Hide Streamlit Branding */
     #MainMenu {visibility: hidden;}
     footer {visibility: hidden;}
@@ -127,6 +214,8 @@ VOICES = {
 # --- Helper Functions ---
 def get_pdf_text(file_bytes, ftype="pdf"):
     """Extract text and TOC from PDF/EPUB."""
+    if ftype == "epub":
+        return get_epub_text(file_bytes)
     try:
         doc = fitz.open(stream=file_bytes, filetype=ftype)
         toc = doc.get_toc()
@@ -151,6 +240,255 @@ def get_page_image(file_bytes, page_num, ftype="pdf"):
     except Exception:
         return None
 
+# --- EPUB (read chapters from the spine, no full-book reflow) ---
+EPUB_NS = {
+    'c': 'urn:oasis:names:tc:opendocument:xmlns:container',
+    'opf': 'http://www.idpf.org/2007/opf',
+    'ncx': 'http://www.daisy.org/z3986/2005/ncx/',
+    'xhtml': 'http://www.w3.org/1999/xhtml',
+    'epub': 'http://www.idpf.org/2007/ops',
+}
+
+# Layout box for a rendered chapter page, close to MuPDF's own EPUB defaults
+EPUB_PAGE = (0, 0, 450, 600)
+EPUB_MARGIN = 36
+
+class _HTMLText(HTMLParser):
+    """Collect readable text from chapter XHTML, one line per block."""
+    BLOCKS = {'p', 'div', 'br', 'li', 'tr', 'section', 'article', 'blockquote', 'pre',
+              'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+    SKIP = {'head', 'script', 'style'}
+
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+        self.skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP:
+            self.skip += 1
+        elif tag in self.BLOCKS:
+            self.parts.append('\n')
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP:
+            self.skip = max(0, self.skip - 1)
+        elif tag in self.BLOCKS:
+            self.parts.append('\n')
+
+    def handle_data(self, data):
+        if not self.skip:
+            # Source line breaks are plain whitespace in HTML
+            self.parts.append(re.sub(r'\s+', ' ', data))
+
+def html_to_text(markup):
+    """Convert chapter XHTML to plain text."""
+    parser = _HTMLText()
+    parser.feed(markup)
+    parser.close()
+    lines = (' '.join(line.split()) for line in ''.join(parser.parts).split('\n'))
+    return '\n'.join(line for line in lines if line)
+
+def _epub_path(base, href):
+    """Resolve an href relative to a directory inside the EPUB archive."""
+    return posixpath.normpath(posixpath.join(base, unquote(href.split('#')[0])))
+
+# Resource links in chapter markup and stylesheets
+_EPUB_LINK_ATTR = re.compile(r'''(\b(?:src|href|xlink:href)\s*=\s*)(["'])(.*?)\2''', re.IGNORECASE | re.DOTALL)
+_EPUB_LINK_TAG = re.compile(r'<link\b[^>]*>', re.IGNORECASE)
+_EPUB_STYLE_TAG = re.compile(r'(<style\b[^>]*>)(.*?)(</style>)', re.IGNORECASE | re.DOTALL)
+_EPUB_CSS_URL = re.compile(r'''url\(\s*(["']?)(.*?)\1\s*\)''', re.IGNORECASE)
+
+def _epub_link(base, href):
+    """Resolve a relative resource link from the archive root; leave external and in-page links alone."""
+    if not href or href.startswith(('#', '/')) or re.match(r'^[a-z][a-z0-9+.-]*:', href, re.IGNORECASE):
+        return href
+    return _epub_path(base, href)
+
+def _epub_css(css, base):
+    """Rewrite url(...) references in a stylesheet to archive-root paths."""
+    return _EPUB_CSS_URL.sub(lambda m: f'url("{_epub_link(base, m.group(2))}")', css)
+
+def _epub_chapter_markup(zf, path):
+    """Return chapter markup and its linked CSS with every link resolved from the archive root.
+
+    fitz.Story looks resources up relative to the archive it is given, so
+    links like ../images/pic.png must be rewritten before layout. Linked
+    stylesheets are removed from the markup and returned for user_css.
+    """
+    chapter_dir = posixpath.dirname(path)
+    markup = zf.read(path).decode('utf-8', errors='replace')
+    sheets = []
+
+    def take_stylesheet(match):
+        tag = match.group(0)
+        if 'stylesheet' not in tag.lower():
+            return tag
+        href = re.search(r'''\bhref\s*=\s*(["'])(.*?)\1''', tag, re.IGNORECASE)
+        if href:
+            css_path = _epub_link(chapter_dir, href.group(2))
+            try:
+                css = zf.read(css_path).decode('utf-8', errors='replace')
+                sheets.append(_epub_css(css, posixpath.dirname(css_path)))
+            except KeyError:
+                pass
+        return ''
+
+    markup = _EPUB_LINK_TAG.sub(take_stylesheet, markup)
+    markup = _EPUB_STYLE_TAG.sub(lambda m: m.group(1) + _epub_css(m.group(2), chapter_dir) + m.group(3), markup)
+    markup = _EPUB_LINK_ATTR.sub(
+        lambda m: f"{m.group(1)}{m.group(2)}{_epub_link(chapter_dir, m.group(3))}{m.group(2)}", markup)
+    return markup, '\n'.join(sheets)
+
+def _epub_spine(zf):
+    """Return the OPF manifest, its directory and the chapter paths in reading order."""
+    container = ET.fromstring(zf.read('META-INF/container.xml'))
+    opf_path = container.find('.//c:rootfile', EPUB_NS).get('full-path')
+    opf = ET.fromstring(zf.read(opf_path))
+    base = posixpath.dirname(opf_path)
+    manifest = {item.get('id'): item for item in opf.iterfind('opf:manifest/opf:item', EPUB_NS)}
+    spine = opf.find('opf:spine', EPUB_NS)
+    chapters = [
+        _epub_path(base, manifest[ref.get('idref')].get('href'))
+        for ref in spine.iterfind('opf:itemref', EPUB_NS)
+        if ref.get('idref') in manifest
+    ]
+    return manifest, base, spine, chapters
+
+def _epub_toc(zf, manifest, base, spine, chapters):
+    """Map the EPUB navigation document (EPUB 3) or NCX (EPUB 2) onto chapters.
+
+    Entries use the same [level, title, page] shape as fitz's get_toc(),
+    where page is the 1-based chapter number (0 if outside the spine).
+    """
+    index = {path: i + 1 for i, path in enumerate(chapters)}
+    toc = []
+
+    nav = next((item for item in manifest.values()
+                if 'nav' in (item.get('properties') or '').split()), None)
+    root = None
+    if nav is not None:
+        nav_path = _epub_path(base, nav.get('href'))
+        nav_dir = posixpath.dirname(nav_path)
+        # Nav documents often use HTML entities such as &nbsp; that XML rejects;
+        # fall back to the NCX rather than losing the TOC
+        try:
+            root = ET.fromstring(zf.read(nav_path))
+        except (ET.ParseError, KeyError):
+            root = None
+    if root is not None:
+
+        def walk_nav(ol, level):
+            for li in ol.findall('xhtml:li', EPUB_NS):
+                link = li.find('xhtml:a', EPUB_NS)
+                if link is not None and link.get('href'):
+                    title = ' '.join(''.join(link.itertext()).split())
+                    toc.append([level, title, index.get(_epub_path(nav_dir, link.get('href')), 0)])
+                sub = li.find('xhtml:ol', EPUB_NS)
+                if sub is not None:
+                    walk_nav(sub, level + 1)
+
+        for nav_el in root.iter(f"{{{EPUB_NS['xhtml']}}}nav"):
+            if nav_el.get(f"{{{EPUB_NS['epub']}}}type") == 'toc':
+                ol = nav_el.find('xhtml:ol', EPUB_NS)
+                if ol is not None:
+                    walk_nav(ol, 1)
+                return toc
+
+    ncx = manifest.get(spine.get('toc'))
+    if ncx is not None:
+        ncx_path = _epub_path(base, ncx.get('href'))
+        ncx_dir = posixpath.dirname(ncx_path)
+        root = ET.fromstring(zf.read(ncx_path))
+
+        def walk_ncx(parent, level):
+            for point in parent.findall('ncx:navPoint', EPUB_NS):
+                title = ' '.join(point.findtext('ncx:navLabel/ncx:text', '', EPUB_NS).split())
+                content = point.find('ncx:content', EPUB_NS)
+                if content is not None and content.get('src'):
+                    toc.append([level, title, index.get(_epub_path(ncx_dir, content.get('src')), 0)])
+                walk_ncx(point, level + 1)
+
+        nav_map = root.find('ncx:navMap', EPUB_NS)
+        if nav_map is not None:
+            walk_ncx(nav_map, 1)
+    return toc
+
+def get_epub_text(file_bytes):
+    """Extract per-chapter text and TOC from an EPUB without laying it out."""
+    try:
+        with zipfile.ZipFile(io.BytesIO(file_bytes)) as zf:
+            manifest, base, spine, chapters = _epub_spine(zf)
+            texts = [html_to_text(zf.read(path).decode('utf-8', errors='replace')) for path in chapters]
+            try:
+                toc = _epub_toc(zf, manifest, base, spine, chapters)
+            except Exception:
+                toc = []
+        return len(texts), texts, toc
+    except Exception as e:
+        st.error(f"Document Error: {e}")
+        return 0, [], []
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def get_chapter_pdf(file_bytes, chapter):
+    """Lay out a single EPUB chapter as PDF bytes; returns (pdf_bytes, page_count).
+
+    Only the laid-out chapter is cached; pages are rendered one at a time
+    with get_page_image() as they are viewed.
+    """
+    try:
+        with zipfile.ZipFile(io.BytesIO(file_bytes)) as zf:
+            chapters = _epub_spine(zf)[3]
+            if chapter >= len(chapters):
+                return None, 0
+            markup, css = _epub_chapter_markup(zf, chapters[chapter])
+            story = fitz.Story(html=markup, user_css=css or None, archive=fitz.Archive(zf))
+
+            mediabox = fitz.Rect(*EPUB_PAGE)
+            where = mediabox + (EPUB_MARGIN, EPUB_MARGIN, -EPUB_MARGIN, -EPUB_MARGIN)
+            buffer = io.BytesIO()
+            writer = fitz.DocumentWriter(buffer)
+            more = True
+            page_count = 0
+            while more:
+                device = writer.begin_page(mediabox)
+                more, _ = story.place(where)
+                story.draw(device)
+                writer.end_page()
+                page_count += 1
+            writer.close()
+        return buffer.getvalue(), page_count
+    except Exception:
+        return None, 0
+
+# edge-tts streams audio-24khz-48kbitrate-mono-mp3 by default
+TTS_BITRATE = 48000
+
+# Longest text sent in a single TTS request (avoids timeouts)
+TTS_CHUNK_CHARS = 5000
+
+def split_text(text, limit=TTS_CHUNK_CHARS):
+    """Split text into chunks of at most `limit` characters on line breaks."""
+    chunks = []
+    current = ""
+    for line in text.split('\n'):
+        while len(line) > limit:
+            cut = line.rfind(' ', 0, limit)
+            cut = cut if cut > 0 else limit
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(line[:cut])
+            line = line[cut:].lstrip()
+        if current and len(current) + 1 + len(line) > limit:
+            chunks.append(current)
+            current = line
+        else:
+            current = f"{current}\n{line}" if current else line
+    if current.strip():
+        chunks.append(current)
+    return [chunk for chunk in chunks if chunk.strip()]
+
 async def _generate_audio(text, voice):
     """Async function to generate audio using edge-tts."""
     communicate = edge_tts.Communicate(text, voice)
@@ -161,14 +499,27 @@ async def _generate_audio(text, voice):
     audio_data.seek(0)
     return audio_data.getvalue()
 
-def make_audio(text, voice):
+def _synthesize(loop, text, voice, known=None):
+    """Return audio for text from the shared store, or synthesize and publish it.
+
+    `known` is an optional set of stored keys (see audio_store_known); keys
+    missing from it are synthesized without a store lookup.
+    """
+    key = audio_key(text, voice)
+    if known is None or key in known:
+        stored = audio_store_get(key)
+        if stored:
+            return stored
+    # Long EPUB chapters are synthesized in chunks and joined
+    audio = b"".join(loop.run_until_complete(_generate_audio(chunk, voice)) for chunk in split_text(text))
+    publish_audio(key, audio)
+    return audio
+
+def make_audio(text, voice, known=None):
     """Generate audio using Edge TTS with proper error handling."""
     if not text or not text.strip():
         return None, 400
     
-    # Limit text length to avoid timeout
-    text = text[:5000]
-    
     try:
         # Get or create event loop
         try:
@@ -180,12 +531,19 @@ def make_audio(text, voice):
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
         
-        audio = loop.run_until_complete(_generate_audio(text, voice))
-        return audio, 200
+        return _synthesize(loop, text, voice, known), 200
     except Exception as e:
         st.error(f"TTS Error: {e}")
         return None, 500
 
+def _synthesize_in_thread(text, voice):
+    """Generate audio on a worker thread using its own event loop."""
+    loop = asyncio.new_event_loop()
+    try:
+        return _synthesize(loop, text, voice)
+    finally:
+        loop.close()
+
 # --- Smart Text Cleaning ---
 def clean_text(text):
     """Clean text by removing page numbers, headers, footers, and artifacts."""
@@ -215,6 +573,225 @@ def clean_text(text):
     
     return '\n'.join(cleaned_lines)
 
+def page_text(page, smart_clean):
+    """Return the text of a page, cleaned if requested."""
+    texts = st.session_state.texts
+    text = texts[page] if 0 <= page < len(texts) else ""
+    return clean_text(text) if smart_clean else text
+
+# --- Speculative Pre-synthesis ---
+@st.cache_resource
+def get_background_executor():
+    """Background workers shared by all sessions for prefetching and publishing audio."""
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="tts-background")
+
+def prefetch_key(page, voice, smart_clean):
+    """Identify prefetched audio by the text it reads and the voice, like the audio store."""
+    return audio_key(page_text(page, smart_clean), voice)
+
+def cancel_prefetch():
+    """Drop any pending pre-synthesis, cancelling it if it has not started."""
+    pending = st.session_state.get('prefetch')
+    if pending:
+        pending['future'].cancel()
+    st.session_state.prefetch = None
+
+def schedule_prefetch(page, voice, smart_clean):
+    """Start synthesizing a page in the background before it is needed."""
+    cancel_prefetch()
+    if not 0 <= page < st.session_state.pages:
+        return
+    text = page_text(page, smart_clean)
+    if not text.strip():
+        return
+    future = get_background_executor().submit(_synthesize_in_thread, text, voice)
+    st.session_state.prefetch = {'key': prefetch_key(page, voice, smart_clean), 'page': page, 'future': future}
+
+def next_readable_page(page, smart_clean):
+    """First page after `page` with readable text, or None at the end of the document."""
+    for candidate in range(page + 1, st.session_state.pages):
+        if page_text(candidate, smart_clean).strip():
+            return candidate
+    return None
+
+def prefetch_next(page, voice, smart_clean):
+    """Pre-synthesize the next readable page after `page`, skipping blank pages."""
+    next_page = next_readable_page(page, smart_clean)
+    if next_page is None:
+        cancel_prefetch()
+    else:
+        schedule_prefetch(next_page, voice, smart_clean)
+
+def drop_stale_prefetch(page, voice, smart_clean, continuous):
+    """Cancel speculative audio once the reader jumps elsewhere or changes voice/settings.
+
+    Prefetched audio is kept only in continuous mode, and only while it is
+    for the current page or the next readable one with the current settings.
+    """
+    pending = st.session_state.get('prefetch')
+    if not pending:
+        return
+    wanted = [prefetch_key(page, voice, smart_clean)]
+    next_page = next_readable_page(page, smart_clean)
+    if next_page is not None:
+        wanted.append(prefetch_key(next_page, voice, smart_clean))
+    if not continuous or pending['key'] not in wanted:
+        cancel_prefetch()
+
+def ensure_prefetch(page, voice, smart_clean, continuous):
+    """Keep the next page prefetched while continuous reading plays the current one."""
+    drop_stale_prefetch(page, voice, smart_clean, continuous)
+    playing = st.session_state.audio_data and st.session_state.reading_page == page + 1
+    if continuous and playing and not st.session_state.prefetch:
+        prefetch_next(page, voice, smart_clean)
+
+def ready_prefetch():
+    """(page, audio) of a finished prefetch, or None while it is running or if it failed."""
+    pending = st.session_state.get('prefetch')
+    if not pending or not pending['future'].done() or pending['future'].cancelled():
+        return None
+    try:
+        audio = pending['future'].result()
+    except Exception:
+        return None
+    return (pending['page'], audio) if audio else None
+
+def take_prefetch(page, voice, smart_clean):
+    """Return prefetched audio for a page, waiting for it if still running."""
+    pending = st.session_state.get('prefetch')
+    if not pending or pending['key'] != prefetch_key(page, voice, smart_clean):
+        return None
+    st.session_state.prefetch = None
+    try:
+        return pending['future'].result(timeout=60)
+    except Exception:
+        return None
+
+def set_audio(audio, reading_page):
+    """Store generated audio as the currently playing track."""
+    st.session_state.audio_data = audio
+    st.session_state.reading_page = reading_page
+
+def read_page(page, voice, smart_clean):
+    """Get audio for a page, using prefetched audio when available."""
+    audio = take_prefetch(page, voice, smart_clean)
+    if audio:
+        return audio
+    text = page_text(page, smart_clean)
+    if not text.strip():
+        return None
+    audio, status = make_audio(text, voice)
+    return audio
+
+# --- Continuous Player ---
+# Playback is chained in the browser: the <audio> element lives in the parent
+# page so reruns (which rebuild this iframe) never interrupt it, and the queued
+# next page starts the moment the current one ends. Starting it clicks the
+# hidden "continuous_advance" button so the server can catch up and prefetch.
+CONTINUOUS_PLAYER_HTML = """
+<div id="bar">
+  <button id="toggle">⏸</button>
+  <span id="label"></span>
+  <input id="seek" type="range" min="0" max="1" step="0.1" value="0">
+  <span id="time">0:00</span>
+</div>
+<style>
+  body { margin: 0; font-family: 'Inter', sans-serif; color: #FAFAFA; }
+  #bar { display: flex; align-items: center; gap: 10px; background: #1C1F26; border-radius: 8px; padding: 10px 12px; }
+  #toggle { background: #262730; color: #FFFFFF; border: 1px solid #262730; border-radius: 8px; padding: 4px 10px; cursor: pointer; }
+  #seek { flex: 1; }
+  #label, #time { font-size: 14px; white-space: nowrap; }
+</style>
+<script>
+const tracks = __TRACKS__;
+const doc = window.parent.document;
+let player = doc.getElementById('pvr-continuous');
+if (!player) {
+  player = doc.createElement('audio');
+  player.id = 'pvr-continuous';
+  player.style.display = 'none';
+  doc.body.appendChild(player);
+}
+const start = (track) => {
+  player.src = track.src;
+  player.dataset.track = track.id;
+  player.dataset.label = track.label;
+  player.play().catch(() => {});
+};
+const advance = () => {
+  const next = player.pvrQueue.shift();
+  if (!next) return;
+  start(next);
+  const trigger = doc.querySelector('.st-key-continuous_advance button');
+  if (trigger) trigger.click();
+};
+player.pvrQueue = tracks.slice(1);
+player.onended = advance;
+if (player.dataset.track !== tracks[0].id) {
+  start(tracks[0]);
+} else if (player.ended) {
+  advance();  // the page ended before the next one was ready
+}
+
+const fmt = (t) => isFinite(t) ? `${Math.floor(t / 60)}:${String(Math.floor(t % 60)).padStart(2, '0')}` : '0:00';
+const toggle = document.getElementById('toggle');
+const seek = document.getElementById('seek');
+toggle.onclick = () => player.paused ? player.play() : player.pause();
+seek.oninput = () => { player.currentTime = Number(seek.value); };
+setInterval(() => {
+  document.getElementById('label').textContent = '🎧 ' + (player.dataset.label || '');
+  toggle.textContent = player.paused ? '▶' : '⏸';
+  seek.max = player.duration || 1;
+  if (document.activeElement !== seek) seek.value = player.currentTime;
+  document.getElementById('time').textContent = fmt(player.currentTime) + ' / ' + fmt(player.duration);
+}, 250);
+</script>
+"""
+
+STOP_PLAYER_HTML = """
+<script>
+const player = window.parent.document.getElementById('pvr-continuous');
+if (player) { player.pause(); player.remove(); }
+</script>
+"""
+
+def audio_track(audio, label):
+    """Describe audio for the browser player: a stable id, a label and a data URL."""
+    return {
+        'id': hashlib.sha1(audio).hexdigest(),
+        'label': label,
+        'src': "data:audio/mpeg;base64," + base64.b64encode(audio).decode('ascii'),
+    }
+
+def continuous_tracks(page, unit):
+    """The playing page plus the prefetched next page once it is ready."""
+    tracks = [audio_track(st.session_state.audio_data, f"{unit} {page + 1}")]
+    ready = ready_prefetch()
+    if ready and ready[0] > page:
+        tracks.append(audio_track(ready[1], f"{unit} {ready[0] + 1}"))
+    return tracks
+
+def continuous_player(tracks):
+    """Play tracks back to back in the browser."""
+    components.html(CONTINUOUS_PLAYER_HTML.replace("__TRACKS__", json.dumps(tracks)), height=60)
+
+def stop_continuous_player():
+    """Stop the browser player once continuous reading is no longer playing."""
+    components.html(STOP_PLAYER_HTML, height=0)
+
+def advance_continuous(voice, smart_clean):
+    """Follow the browser onto the next page once it has started the prefetched audio."""
+    next_page = next_readable_page(st.session_state.page, smart_clean)
+    if next_page is None:
+        return
+    audio = read_page(next_page, voice, smart_clean)
+    st.session_state.page = next_page
+    if audio:
+        set_audio(audio, next_page + 1)
+        prefetch_next(next_page, voice, smart_clean)
+    else:
+        st.session_state.audio_data = None
+
 # --- Cloud Storage (with error handling) ---
 def cloud_upload(file_bytes, filename, bucket="pdfs"):
     """Upload file to Supabase storage."""
@@ -262,6 +839,111 @@ def cloud_delete(name, bucket="pdfs"):
     except Exception:
         return False
 
+# --- Shared Audio Store (content-addressed) ---
+AUDIO_BUCKET = "audio"
+# One manifest per voice, so checking a whole range is a single download
+AUDIO_MANIFEST_DIR = "manifest"
+
+def _tts_engine_version():
+    """Identify the TTS engine so upgrades never reuse stale audio."""
+    try:
+        return f"edge-tts/{version('edge-tts')}/{TTS_BITRATE}"
+    except PackageNotFoundError:
+        return f"edge-tts/unknown/{TTS_BITRATE}"
+
+TTS_ENGINE = _tts_engine_version()
+
+def audio_key(text, voice):
+    """Storage name for audio of (cleaned text, voice, engine version), filed by voice."""
+    payload = json.dumps([text, voice, TTS_ENGINE], ensure_ascii=False)
+    return f"{voice}/{hashlib.sha256(payload.encode('utf-8')).hexdigest()}.mp3"
+
+@st.cache_resource
+def get_manifest_lock(name):
+    """Serialize updates to one manifest across sessions and background workers in this process."""
+    return threading.Lock()
+
+def _manifest_name(key):
+    """Manifest that lists a key: one per voice folder."""
+    return f"{AUDIO_MANIFEST_DIR}/{key.split('/')[0]}.json"
+
+def _is_not_found(error):
+    """True if a storage error means the object does not exist, rather than a failed request."""
+    if isinstance(error, FileNotFoundError):
+        return True
+    status = getattr(error, 'status', None) or getattr(error, 'status_code', None)
+    return str(status) == '404' or 'not found' in str(error).lower()
+
+def _read_manifest(bucket, name):
+    """Keys listed in one manifest; empty if it does not exist yet.
+
+    Any other failure (network error, unreadable file) is raised so callers
+    never mistake it for an empty manifest.
+    """
+    try:
+        data = bucket.download(name)
+    except Exception as e:
+        if _is_not_found(e):
+            return set()
+        raise
+    return set(json.loads(data))
+
+def audio_store_known(keys):
+    """Subset of `keys` listed in the store manifest, for batch existence checks.
+
+    Only the manifests covering `keys` are read, one per voice. Returns None if the manifest
+    cannot be read, so callers fall back to looking up each key.
+    """
+    if not audio_store:
+        return set()
+    bucket = audio_store.from_(AUDIO_BUCKET)
+    wanted = set(keys)
+    known = set()
+    try:
+        for name in sorted({_manifest_name(key) for key in wanted}):
+            known |= _read_manifest(bucket, name) & wanted
+    except Exception:
+        return None
+    return known
+
+def audio_store_get(key):
+    """Fetch stored audio by key, or None if missing or unavailable."""
+    if not audio_store:
+        return None
+    try:
+        return audio_store.from_(AUDIO_BUCKET).download(key) or None
+    except Exception:
+        return None
+
+def audio_store_put(key, audio):
+    """Publish audio under its key and record it in the manifest."""
+    if not audio_store or not audio:
+        return False
+    bucket = audio_store.from_(AUDIO_BUCKET)
+    try:
+        bucket.upload(key, audio, file_options={"content-type": "audio/mpeg", "upsert": "true"})
+    except Exception:
+        return False
+    # Only rewrite a manifest that was read successfully (or does not exist yet).
+    # Replicas updating the same manifest at once can still drop an entry; range
+    # reads then synthesize that audio once more, which re-adds it.
+    name = _manifest_name(key)
+    with get_manifest_lock(name):
+        try:
+            keys = _read_manifest(bucket, name)
+            if key not in keys:
+                keys.add(key)
+                bucket.upload(name, json.dumps(sorted(keys)).encode('utf-8'),
+                              file_options={"content-type": "application/json", "upsert": "true"})
+        except Exception:
+            pass
+    return True
+
+def publish_audio(key, audio):
+    """Publish audio to the store in the background so the listener never waits on it."""
+    if audio_store and audio:
+        get_background_executor().submit(audio_store_put, key, audio)
+
 # --- Navigation Callbacks ---
 def nav_page(delta):
     """Navigate to next/previous page."""
@@ -278,6 +960,16 @@ def set_page_from_input():
             st.session_state.page = new_page
             st.session_state.audio_data = None
 
+CHAPTER_PLACEHOLDER = "Select chapter..."
+
+def jump_to_chapter(chapter_map):
+    """Jump to the chapter picked in the sidebar, then reset the picker."""
+    target = chapter_map.get(st.session_state.nav_chapter)
+    if target is not None and 0 <= target < st.session_state.pages:
+        st.session_state.page = target
+        st.session_state.audio_data = None
+    st.session_state.nav_chapter = CHAPTER_PLACEHOLDER
+
 # --- Initialize Session State ---
 def init_session_state():
     """Initialize all session state variables."""
@@ -291,6 +983,7 @@ def init_session_state():
         'fname': '',
         'audio_data': None,
         'reading_page': None,
+        'prefetch': None,
     }
     for key, value in defaults.items():
         if key not in st.session_state:
@@ -310,6 +1003,10 @@ def main():
     # Initialize session state
     init_session_state()
     
+    # EPUBs are navigated by chapter rather than by page
+    unit = "Chapter" if st.session_state.ftype == "epub" else "Page"
+    unit_short = "Ch" if st.session_state.ftype == "epub" else "Pg"
+    
     # --- Sidebar ---
     with st.sidebar:
         st.header("🎤 Voice Settings")
@@ -319,21 +1016,21 @@ def main():
         smart_clean = st.checkbox("✨ Smart Cleaning", value=True, 
                                    help="Removes headers, footers & page numbers")
         
+        continuous = st.checkbox("🔁 Continuous Reading", value=False,
+                                 help=f"Prepares the next {unit.lower()} while this one plays and starts it as soon as this one ends")
+        
         # Chapter Navigation
         if st.session_state.toc:
             st.markdown("---")
             st.header("📌 Chapters")
             chapter_map = {
-                f"{item[1][:30]}... (Pg {item[2]})" if len(item[1]) > 30 else f"{item[1]} (Pg {item[2]})": item[2] - 1
+                f"{item[1][:30]}... ({unit_short} {item[2]})" if len(item[1]) > 30 else f"{item[1]} ({unit_short} {item[2]})": item[2] - 1
                 for item in st.session_state.toc if item[2] > 0
             }
             if chapter_map:
-                options = ["Select chapter..."] + list(chapter_map.keys())
-                sel_chap = st.selectbox("Jump to Chapter", options)
-                if sel_chap != "Select chapter..." and chapter_map.get(sel_chap, -1) != st.session_state.page:
-                    st.session_state.page = chapter_map[sel_chap]
-                    st.session_state.audio_data = None
-                    st.rerun()
+                options = [CHAPTER_PLACEHOLDER] + list(chapter_map.keys())
+                st.selectbox("Jump to Chapter", options, key="nav_chapter",
+                             on_change=jump_to_chapter, args=(chapter_map,))
         
         # Cloud Library
         st.markdown("---")
@@ -415,12 +1112,16 @@ def main():
         page = st.session_state.page
         ftype = st.session_state.ftype
         
+        ensure_prefetch(page, voice, smart_clean, continuous)
+        continuous_playing = bool(continuous and st.session_state.audio_data
+                                  and st.session_state.reading_page == page + 1)
+        
         # --- Audio Player (if audio exists) ---
         if st.session_state.audio_data:
             reading_info = st.session_state.reading_page or "audio"
             
             ac1, ac2, ac3 = st.columns([3, 1, 1])
-            ac1.success(f"🎧 Playing: Page {reading_info}")
+            ac1.success(f"🎧 Playing: {unit} {reading_info}")
             ac2.download_button("📥 MP3", st.session_state.audio_data, "audio.mp3", "audio/mp3", key="dl_audio")
             
             if supabase and ac3.button("☁️ Save MP3"):
@@ -429,47 +1130,62 @@ def main():
                 if cloud_upload(st.session_state.audio_data, mp3_name):
                     st.toast(f"Saved: {mp3_name}", icon="☁️")
             
-            st.audio(st.session_state.audio_data, format="audio/mp3")
+            if continuous_playing:
+                continuous_player(continuous_tracks(page, unit))
+                st.button("continuous advance", key="continuous_advance",
+                          on_click=advance_continuous, args=(voice, smart_clean))
+            else:
+                st.audio(st.session_state.audio_data, format="audio/mp3")
             st.markdown("---")
         
+        if not continuous_playing:
+            stop_continuous_player()
+        
         # --- Navigation Controls ---
         c_nav, c_act = st.columns([2, 1])
         
         with c_nav:
             n1, n2, n3 = st.columns([1, 1.5, 1])
             n1.button("◀ Prev", on_click=nav_page, args=(-1,), disabled=(page <= 0), use_container_width=True)
-            n2.number_input("Page", 1, pages, page + 1, key="nav_goto", label_visibility="collapsed", on_change=set_page_from_input)
+            n2.number_input(unit, 1, pages, page + 1, key="nav_goto", label_visibility="collapsed", on_change=set_page_from_input)
             n3.button("Next ▶", on_click=nav_page, args=(1,), disabled=(page >= pages - 1), use_container_width=True)
         
         with c_act:
-            if st.button("🔊 Read Page", type="primary", use_container_width=True):
-                text = texts[page] if page < len(texts) else ""
-                if smart_clean:
-                    text = clean_text(text)
-                
-                if text.strip():
+            if st.button(f"🔊 Read {unit}", type="primary", use_container_width=True):
+                if page_text(page, smart_clean).strip():
                     with st.spinner("Generating audio..."):
-                        audio, status = make_audio(text, voice)
+                        audio = read_page(page, voice, smart_clean)
                         if audio:
-                            st.session_state.audio_data = audio
-                            st.session_state.reading_page = page + 1
+                            set_audio(audio, page + 1)
+                            if continuous:
+                                prefetch_next(page, voice, smart_clean)
                             st.rerun()
                         else:
                             st.error("Failed to generate audio. Please try again.")
                 else:
-                    st.warning("No readable text on this page")
+                    st.warning(f"No readable text on this {unit.lower()}")
         
         # --- Page Display ---
-        st.caption(f"📄 Page {page + 1} of {pages} • {st.session_state.fname}")
+        st.caption(f"📄 {unit} {page + 1} of {pages} • {st.session_state.fname}")
         
-        img = get_page_image(st.session_state.pdf, page, ftype=ftype)
+        # EPUBs are laid out one chapter at a time instead of reflowing the whole book,
+        # and only the viewed page of the chapter is rendered
+        if ftype == "epub":
+            chapter_pdf, chapter_pages = get_chapter_pdf(st.session_state.pdf, page)
+            view = 0
+            if chapter_pages > 1:
+                view = st.number_input(f"Page in {unit.lower()} (of {chapter_pages})", 1, chapter_pages, 1,
+                                       key=f"chapter_view_{page}") - 1
+            img = get_page_image(chapter_pdf, view) if chapter_pdf else None
+        else:
+            img = get_page_image(st.session_state.pdf, page, ftype=ftype)
         if img:
             st.image(img, use_container_width=True)
         else:
-            st.warning("Could not render page image")
+            st.warning(f"Could not render {unit.lower()} image")
             # Show text fallback
             if page < len(texts) and texts[page].strip():
-                st.text_area("Page Text", texts[page][:2000], height=300, disabled=True)
+                st.text_area(f"{unit} Text", texts[page][:2000], height=300, disabled=True)
         
         # --- Advanced Tools ---
         with st.expander("📚 Advanced Tools"):
@@ -483,10 +1199,10 @@ def main():
             st.markdown("---")
             
             # Range Read
-            st.markdown("**📖 Read Multiple Pages**")
+            st.markdown(f"**📖 Read Multiple {unit}s**")
             r1, r2 = st.columns(2)
-            start = r1.number_input("Start Page", 1, pages, 1, key="r_start")
-            end = r2.number_input("End Page", 1, pages, min(pages, 5), key="r_end")
+            start = r1.number_input(f"Start {unit}", 1, pages, 1, key="r_start")
+            end = r2.number_input(f"End {unit}", 1, pages, min(pages, 5), key="r_end")
             
             if st.button("▶️ Generate Range Audio", disabled=(start > end)):
                 if start <= end:
@@ -495,19 +1211,21 @@ def main():
                     status_text = st.empty()
                     total = end - start + 1
                     success_count = 0
+                    # One batch manifest check for the whole range
+                    range_texts = {pg: page_text(pg, smart_clean) for pg in range(start - 1, end)}
+                    stored_keys = audio_store_known(
+                        [audio_key(t, voice) for t in range_texts.values() if t.strip()]) if audio_store else None
                     
                     for i, pg in enumerate(range(start - 1, end)):
                         if pg < len(texts):
-                            status_text.text(f"Processing page {pg + 1} of {end}...")
+                            status_text.text(f"Processing {unit.lower()} {pg + 1} of {end}...")
                             prog.progress((i + 1) / total)
                             
-                            t_chunk = texts[pg]
-                            if smart_clean:
-                                t_chunk = clean_text(t_chunk)
+                            t_chunk = range_texts[pg]
                             
                             if t_chunk.strip():
                                 try:
-                                    audio_chunk, s = make_audio(t_chunk, voice)
+                                    audio_chunk, s = make_audio(t_chunk, voice, known=stored_keys)
                                     if audio_chunk:
                                         all_audio.write(audio_chunk)
                                         success_count += 1
@@ -521,9 +1239,8 @@ def main():
                     
                     result = all_audio.getvalue()
                     if len(result) > 100:
-                        st.session_state.audio_data = result
-                        st.session_state.reading_page = f"{start}-{end}"
-                        st.success(f"Generated audio for {success_count} pages!")
+                        set_audio(result, f"{start}-{end}")
+                        st.success(f"Generated audio for {success_count} {unit.lower()}s!")
                         st.rerun()
                     else:
                         st.error("Could not generate audio for the selected range")
@@ -533,7 +1250,18 @@ def main():
             # Raw Text View
             st.markdown("**📝 Raw Text**")
             current_text = texts[page][:2000] if page < len(texts) else ""
-            st.text_area("Page Content", current_text, height=150, disabled=True)
+            st.text_area(f"{unit} Content", current_text, height=150, disabled=True)
+        
+        # --- Continuous Reading ---
+        # Hand the next page to the browser player as soon as its audio is ready.
+        # Any widget interaction interrupts this wait via Streamlit's rerun.
+        pending = st.session_state.prefetch
+        if continuous_playing and pending and not pending['future'].done():
+            status = st.empty()
+            while not pending['future'].done():
+                status.caption(f"⏳ Preparing the next {unit.lower()}...")
+                time.sleep(0.5)
+            st.rerun()
     
     else:
         # Welcome Screen
@@ -544,6 +1272,7 @@ def main():
         - 📄 **PDF & EPUB Support** - Upload and view documents
         - 🔊 **Text-to-Speech** - Listen to any page with natural voices
         - 📚 **Range Reading** - Generate audio for multiple pages
+        - 🔁 **Continuous Reading** - Next page is prepared in the background and plays without a gap
         - ☁️ **Cloud Storage** - Save and access documents anywhere
         - 📌 **Chapter Navigation** - Jump to chapters via table of contents
         """)
@@ -0,0 +1,44 @@
+import functools
+import sys
+from unittest.mock import MagicMock
+
+# Stub Streamlit and network-bound modules BEFORE importing app
+class SessionState(dict):
+    def __getattr__(self, key):
+        if key in self:
+            return self[key]
+        raise AttributeError(f"'SessionState' object has no attribute '{key}'")
+    def __setattr__(self, key, value):
+        self[key] = value
+
+def passthrough_cache(func=None, **kwargs):
+    """Stand-in for st.cache_data that leaves functions uncached."""
+    if func is None:
+        return lambda f: f
+    return func
+
+def shared_resource(func=None, **kwargs):
+    """Stand-in for st.cache_resource: one shared result per set of arguments."""
+    if func is None:
+        return shared_resource
+    return functools.cache(func)
+
+mock_st = MagicMock()
+mock_st.session_state = SessionState()
+mock_st.secrets = {}  # no Supabase or audio store configured
+mock_st.cache_data = passthrough_cache
+mock_st.cache_resource = shared_resource
+sys.modules["streamlit"] = mock_st
+sys.modules["streamlit.components"] = mock_st.components
+sys.modules["streamlit.components.v1"] = mock_st.components.v1
+sys.modules["edge_tts"] = MagicMock()
+sys.modules["supabase"] = MagicMock()
+
+# Use the real renderer when PyMuPDF is installed
+try:
+    import fitz
+except ImportError:
+    sys.modules["fitz"] = MagicMock()
+
+# Import once here so every test module shares the stubs above
+import app
@@ -0,0 +1,185 @@
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import pytest
+
+import app
+
+calls = []
+
+async def fake_generate_audio(text, voice):
+    calls.append((text, voice))
+    return f"{voice}:{text}".encode()
+
+class Background(ThreadPoolExecutor):
+    """Executor that remembers its work so tests can wait for background publishes."""
+
+    def __init__(self):
+        super().__init__(max_workers=4)
+        self.futures = []
+
+    def submit(self, *args, **kwargs):
+        future = super().submit(*args, **kwargs)
+        self.futures.append(future)
+        return future
+
+    def drain(self):
+        wait(self.futures)
+
+class CountingStorage(app.LocalStorage):
+    """LocalStorage that counts the listener's bucket calls (background publishes excluded)."""
+
+    def __init__(self, root):
+        super().__init__(root)
+        self.counts = {'download': 0, 'upload': 0, 'list': 0}
+
+    def from_(self, bucket):
+        bucket_obj = super().from_(bucket)
+        counts = self.counts
+
+        class Counted:
+            def __getattr__(self, name):
+                if name in counts and threading.current_thread() is threading.main_thread():
+                    counts[name] += 1
+                return getattr(bucket_obj, name)
+
+        return Counted()
+
+@pytest.fixture
+def background(monkeypatch):
+    executor = Background()
+    monkeypatch.setattr(app, "get_background_executor", lambda: executor)
+    yield executor
+    executor.shutdown(wait=True)
+
+@pytest.fixture
+def store_root(monkeypatch, tmp_path, background):
+    monkeypatch.setattr(app, "_generate_audio", fake_generate_audio)
+    monkeypatch.setattr(app, "audio_store", app.LocalStorage(str(tmp_path)))
+    calls.clear()
+    return str(tmp_path)
+
+def test_audio_store(monkeypatch, store_root, background):
+    print("🧪 Starting Shared Audio Store Test...")
+
+    # Test 1: Keys depend on text and voice, not on who asked
+    key = app.audio_key("Hello there.", "en-US-JennyNeural")
+    assert key == app.audio_key("Hello there.", "en-US-JennyNeural")
+    assert key != app.audio_key("Hello there.", "en-US-GuyNeural")
+    assert key != app.audio_key("Hello there!", "en-US-JennyNeural")
+    print("✅ Test 1 Passed: Content-addressed keys")
+
+    # Test 2: First request synthesizes and publishes
+    audio, status = app.make_audio("Hello there.", "en-US-JennyNeural")
+    assert status == 200 and audio == b"en-US-JennyNeural:Hello there."
+    assert len(calls) == 1
+    background.drain()
+    assert app.audio_store_known([key]) == {key}, "Manifest should list published audio"
+    print("✅ Test 2 Passed: New audio published to the store")
+
+    # Test 3: Another replica sharing the storage reuses it without calling TTS
+    monkeypatch.setattr(app, "audio_store", app.LocalStorage(store_root))
+    audio, status = app.make_audio("Hello there.", "en-US-JennyNeural")
+    assert audio == b"en-US-JennyNeural:Hello there."
+    assert len(calls) == 1, "Stored audio should skip synthesis"
+    print("✅ Test 3 Passed: Stored audio reused")
+
+    # Test 4: Range reads check the manifest in one batch
+    second = app.audio_key("Second page.", "en-US-JennyNeural")
+    known = app.audio_store_known([key, second])
+    assert known == {key}
+    app.make_audio("Second page.", "en-US-JennyNeural", known=known)
+    app.make_audio("Hello there.", "en-US-JennyNeural", known=known)
+    assert len(calls) == 2, "Only the unknown page should be synthesized"
+    background.drain()
+    assert app.audio_store_known([key, second]) == {key, second}
+    print("✅ Test 4 Passed: Manifest batch check")
+
+    # Test 5: The stand-in refuses overwrites unless upserting
+    bucket = app.audio_store.from_(app.AUDIO_BUCKET)
+    with pytest.raises(FileExistsError):
+        bucket.upload(key, b"other")
+    assert bucket.download(key) == b"en-US-JennyNeural:Hello there."
+    print("✅ Test 5 Passed: Local storage stand-in semantics")
+
+def test_no_audio_store(monkeypatch):
+    # Without a store everything is synthesized as before
+    monkeypatch.setattr(app, "audio_store", None)
+    key = app.audio_key("Hello there.", "en-US-JennyNeural")
+    assert app.audio_store_known([key]) == set()
+    assert app.audio_store_get(key) is None
+    assert app.audio_store_put(key, b"data") is False
+    print("✅ Test Passed: No store configured")
+
+def test_concurrent_puts_keep_manifest(store_root):
+    # Prefetch workers and sessions publish at the same time
+    keys = [app.audio_key(f"Page {i}", "en-US-JennyNeural") for i in range(200)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert all(pool.map(lambda k: app.audio_store_put(k, b"audio"), keys))
+    assert app.audio_store_known(keys) == set(keys), "Manifest lost entries"
+
+    shards = os.path.join(store_root, app.AUDIO_BUCKET, app.AUDIO_MANIFEST_DIR)
+    for name in os.listdir(shards):
+        with open(os.path.join(shards, name)) as f:
+            json.load(f)
+    print("✅ Test Passed: Concurrent publishes keep every manifest entry")
+
+def test_range_check_is_one_download(monkeypatch, tmp_path, background):
+    monkeypatch.setattr(app, "_generate_audio", fake_generate_audio)
+    storage = CountingStorage(str(tmp_path))
+    monkeypatch.setattr(app, "audio_store", storage)
+    texts = [f"Page {i} text." for i in range(10)]
+    keys = [app.audio_key(t, "en-US-JennyNeural") for t in texts]
+
+    # Cold range: one manifest download, no per-page lookups
+    known = app.audio_store_known(keys)
+    for t in texts:
+        app.make_audio(t, "en-US-JennyNeural", known=known)
+    assert storage.counts['download'] == 1, f"Cold range made {storage.counts['download']} downloads"
+    background.drain()
+
+    # Warm range: one manifest download plus one download per page
+    storage.counts.update(download=0, upload=0, list=0)
+    known = app.audio_store_known(keys)
+    assert known == set(keys)
+    for t in texts:
+        app.make_audio(t, "en-US-JennyNeural", known=known)
+    assert storage.counts == {'download': 11, 'upload': 0, 'list': 0}, storage.counts
+    print("✅ Test Passed: Range checks cost one manifest download")
+
+def test_publish_does_not_block_listener(monkeypatch, store_root, background):
+    release = threading.Event()
+    put = app.audio_store_put
+    monkeypatch.setattr(app, "audio_store_put", lambda key, audio: release.wait(5) and put(key, audio))
+
+    # Audio comes back while the upload is still pending
+    audio, status = app.make_audio("Hello there.", "en-US-JennyNeural")
+    assert audio == b"en-US-JennyNeural:Hello there."
+    assert not any(f.done() for f in background.futures), "Publish should still be running"
+    release.set()
+    background.drain()
+    assert app.audio_store_get(app.audio_key("Hello there.", "en-US-JennyNeural")) == audio
+    print("✅ Test Passed: Publishing happens in the background")
+
+def test_failed_manifest_read_keeps_manifest(monkeypatch, store_root):
+    key = app.audio_key("Hello there.", "en-US-JennyNeural")
+    app.audio_store_put(key, b"audio")
+
+    # A failed read must not be mistaken for an empty manifest
+    download = app.LocalBucket.download
+    def flaky_download(self, path):
+        if path.startswith(app.AUDIO_MANIFEST_DIR):
+            raise ConnectionError("network down")
+        return download(self, path)
+    monkeypatch.setattr(app.LocalBucket, "download", flaky_download)
+
+    other = f"en-US-JennyNeural/{'0' * 64}.mp3"  # same voice manifest as key
+    assert app.audio_store_put(other, b"audio")
+    assert app.audio_store_known([key]) is None, "Unreadable manifest should report unknown"
+
+    monkeypatch.setattr(app.LocalBucket, "download", download)
+    assert app.audio_store_known([key, other]) == {key}, "Existing entries should survive"
+    assert app.audio_store_get(other) == b"audio"
+    print("✅ Test Passed: Failed manifest reads do not wipe the manifest")
@@ -0,0 +1,166 @@
+import io
+import zipfile
+from unittest.mock import MagicMock
+
+import pytest
+
+import app
+
+CONTAINER = """<?xml version="1.0"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles><rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/></rootfiles>
+</container>"""
+
+OPF = """<?xml version="1.0"?>
+<package xmlns="http://www.idpf.org/2007/opf" version="3.0">
+  <manifest>
+    <item id="nav" href="nav.xhtml" media-type="application/xhtml+xml" properties="nav"/>
+    <item id="ncx" href="toc.ncx" media-type="application/x-dtbncx+xml"/>
+    <item id="c1" href="text/ch1.xhtml" media-type="application/xhtml+xml"/>
+    <item id="c2" href="text/ch%202.xhtml" media-type="application/xhtml+xml"/>
+  </manifest>
+  <spine toc="ncx"><itemref idref="c1"/><itemref idref="c2"/></spine>
+</package>"""
+
+NAV = """<?xml version="1.0"?>
+<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops"><body>
+  <nav epub:type="toc"><ol>
+    <li><a href="text/ch1.xhtml">Chapter One</a>
+      <ol><li><a href="text/ch1.xhtml#s1">Section</a></li></ol></li>
+    <li><a href="text/ch%202.xhtml">Chapter Two</a></li>
+  </ol></nav>
+</body></html>"""
+
+NCX = """<?xml version="1.0"?>
+<ncx xmlns="http://www.daisy.org/z3986/2005/ncx/"><navMap>
+  <navPoint id="p1"><navLabel><text>One</text></navLabel><content src="text/ch1.xhtml"/></navPoint>
+  <navPoint id="p2"><navLabel><text>Two</text></navLabel><content src="text/ch%202.xhtml"/></navPoint>
+</navMap></ncx>"""
+
+CH1 = """<html xmlns="http://www.w3.org/1999/xhtml"><head><title>Ignored</title><style>p {}</style></head>
+<body><h1>Chapter One</h1><p>It was a   dark
+night.</p><p>The end&nbsp;of one.</p></body></html>"""
+
+CH2 = """<html xmlns="http://www.w3.org/1999/xhtml"><body><p>Second chapter.</p></body></html>"""
+
+def build_epub(with_nav=True, nav=NAV):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        zf.writestr("mimetype", "application/epub+zip")
+        zf.writestr("META-INF/container.xml", CONTAINER)
+        opf = OPF if with_nav else OPF.replace(' properties="nav"', "")
+        zf.writestr("OEBPS/content.opf", opf)
+        zf.writestr("OEBPS/nav.xhtml", nav)
+        zf.writestr("OEBPS/toc.ncx", NCX)
+        zf.writestr("OEBPS/text/ch1.xhtml", CH1)
+        zf.writestr("OEBPS/text/ch 2.xhtml", CH2)
+    return buffer.getvalue()
+
+def test_epub_chapters(monkeypatch):
+    print("🧪 Starting EPUB Chapter Test...")
+    monkeypatch.setattr(app.fitz, "open", MagicMock())
+
+    # Test 1: Chapters come from the spine, without opening the book in MuPDF
+    count, texts, toc = app.get_pdf_text(build_epub(), "epub")
+    assert count == 2, f"Expected 2 chapters, got {count}"
+    assert texts[0] == "Chapter One\nIt was a dark night.\nThe end of one.", f"Unexpected text {texts[0]!r}"
+    assert texts[1] == "Second chapter."
+    assert not app.fitz.open.called, "EPUB text should not need a full layout"
+    print("✅ Test 1 Passed: Spine chapters extracted")
+
+    # Test 2: EPUB 3 navigation maps onto chapter numbers
+    assert toc == [[1, "Chapter One", 1], [2, "Section", 1], [1, "Chapter Two", 2]], f"Unexpected TOC {toc}"
+    print("✅ Test 2 Passed: Navigation document TOC")
+
+    # Test 3: EPUB 2 books fall back to the NCX
+    _, _, toc = app.get_pdf_text(build_epub(with_nav=False), "epub")
+    assert toc == [[1, "One", 1], [1, "Two", 2]], f"Unexpected TOC {toc}"
+    print("✅ Test 3 Passed: NCX TOC")
+
+    # Test 4: A nav document XML cannot parse (HTML entities) falls back to the NCX
+    _, _, toc = app.get_pdf_text(build_epub(nav=NAV.replace("Chapter Two", "Chapter&nbsp;Two")), "epub")
+    assert toc == [[1, "One", 1], [1, "Two", 2]], f"Unexpected TOC {toc}"
+    print("✅ Test 4 Passed: Broken nav falls back to the NCX")
+
+    print("\n🎉 ALL TESTS PASSED! EPUBs are read chapter by chapter.")
+
+def test_split_text():
+    print("🧪 Starting Text Chunking Test...")
+    text = "\n".join(["word " * 300] * 10)
+    chunks = app.split_text(text, limit=2000)
+    assert all(len(chunk) <= 2000 for chunk in chunks)
+    assert " ".join(" ".join(chunks).split()) == " ".join(text.split()), "No text should be lost"
+    assert app.split_text("short") == ["short"]
+    print("✅ Test Passed: Long chapters split for TTS")
+
+STYLED_CH = """<?xml version="1.0"?>
+<html xmlns="http://www.w3.org/1999/xhtml"><head>
+  <link rel="stylesheet" type="text/css" href="../styles/s.css"/>
+</head><body><p class="red">Red text for the stylesheet check</p>
+<img src="../images/pic.png" alt="pic"/></body></html>"""
+
+def build_illustrated_epub():
+    fitz = app.fitz
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 60, 60), False)
+    pix.set_rect(pix.irect, (0, 0, 255))
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        zf.writestr("mimetype", "application/epub+zip")
+        zf.writestr("META-INF/container.xml", CONTAINER)
+        zf.writestr("OEBPS/content.opf", OPF)
+        zf.writestr("OEBPS/nav.xhtml", NAV)
+        zf.writestr("OEBPS/toc.ncx", NCX)
+        zf.writestr("OEBPS/text/ch1.xhtml", STYLED_CH)
+        zf.writestr("OEBPS/text/ch 2.xhtml", CH2)
+        zf.writestr("OEBPS/styles/s.css", "p.red { color: #ff0000; font-size: 30px; }")
+        zf.writestr("OEBPS/images/pic.png", pix.tobytes("png"))
+    return buffer.getvalue()
+
+def count_pixels(png, rgb):
+    pix = app.fitz.Pixmap(png)
+    samples, n = pix.samples, pix.n
+    return sum(
+        1 for i in range(0, len(samples), n)
+        if all(abs(samples[i + c] - rgb[c]) < 60 for c in range(3))
+    )
+
+def test_chapter_rendering():
+    if isinstance(app.fitz, MagicMock):
+        pytest.skip("PyMuPDF is not installed")
+    print("🧪 Starting Chapter Rendering Test...")
+
+    chapter_pdf, chapter_pages = app.get_chapter_pdf(build_illustrated_epub(), 0)
+    assert chapter_pdf and chapter_pages >= 1, "Chapter should lay out at least one page"
+    images = [app.get_page_image(chapter_pdf, 0)]
+
+    # Test 1: Images linked relative to the chapter are found in the archive
+    assert count_pixels(images[0], (0, 0, 255)) > 1000, "Chapter image is missing"
+    print("✅ Test 1 Passed: Chapter image rendered")
+
+    # Test 2: Linked stylesheets are applied
+    assert count_pixels(images[0], (255, 0, 0)) > 100, "Chapter stylesheet was not applied"
+    print("✅ Test 2 Passed: Chapter stylesheet applied")
+
+    assert app.get_chapter_pdf(build_illustrated_epub(), 5) == (None, 0)
+
+def test_long_chapter_renders_one_page_at_a_time(monkeypatch):
+    if isinstance(app.fitz, MagicMock):
+        pytest.skip("PyMuPDF is not installed")
+    long_chapter = "<html><body>" + "<p>A fairly long paragraph of chapter text.</p>" * 400 + "</body></html>"
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        zf.writestr("META-INF/container.xml", CONTAINER)
+        zf.writestr("OEBPS/content.opf", OPF)
+        zf.writestr("OEBPS/text/ch1.xhtml", long_chapter)
+        zf.writestr("OEBPS/text/ch 2.xhtml", CH2)
+
+    # The chapter is laid out once as PDF; only the viewed page becomes an image
+    chapter_pdf, chapter_pages = app.get_chapter_pdf(buffer.getvalue(), 0)
+    assert chapter_pages > 5
+    rendered = []
+    get_pixmap = app.fitz.Page.get_pixmap
+    monkeypatch.setattr(app.fitz.Page, "get_pixmap",
+                        lambda self, *a, **k: rendered.append(self.number) or get_pixmap(self, *a, **k))
+    assert app.get_page_image(chapter_pdf, 3)
+    assert rendered == [3]
+    print("✅ Test Passed: Only the viewed chapter page is rendered")
@@ -0,0 +1,181 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import app
+
+state = app.st.session_state
+calls = []
+
+def fake_synthesize(text, voice):
+    calls.append((text, voice))
+    time.sleep(0.05)
+    return f"{voice}:{text}".encode()
+
+@pytest.fixture(autouse=True)
+def document(monkeypatch):
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(app, "get_background_executor", lambda: executor)
+    monkeypatch.setattr(app, "_synthesize_in_thread", fake_synthesize)
+    state['fname'] = "book.pdf"
+    # Trailing page numbers make cleaned and raw text differ
+    state['texts'] = ["Page one text\n1", "Page two text\n2", "   ", "Page four text\n4"]
+    state['pages'] = 4
+    state['page'] = 0
+    state['prefetch'] = None
+    state['audio_data'] = None
+    state['reading_page'] = None
+    calls.clear()
+    yield
+    executor.shutdown(wait=True)
+
+def test_prefetch():
+    print("🧪 Starting Pre-synthesis Test...")
+
+    # Test 1: Next page is synthesized in the background and handed over
+    app.schedule_prefetch(1, "en-US-JennyNeural", False)
+    audio = app.take_prefetch(1, "en-US-JennyNeural", False)
+    assert audio == b"en-US-JennyNeural:Page two text\n2", f"Unexpected audio {audio!r}"
+    assert state['prefetch'] is None, "Prefetch should be consumed"
+    print("✅ Test 1 Passed: Prefetched audio is reused")
+
+    # Test 2: A different voice does not reuse speculative audio
+    app.schedule_prefetch(1, "en-US-JennyNeural", False)
+    assert app.take_prefetch(1, "en-US-GuyNeural", False) is None
+    print("✅ Test 2 Passed: Voice change misses the prefetch")
+
+    # Test 3: Cancelling drops the pending work
+    app.schedule_prefetch(3, "en-US-JennyNeural", True)
+    app.cancel_prefetch()
+    assert state['prefetch'] is None
+    assert app.take_prefetch(3, "en-US-JennyNeural", True) is None
+    print("✅ Test 3 Passed: Cancelled prefetch is discarded")
+
+    # Test 4: Blank pages and the end of the document schedule nothing
+    app.schedule_prefetch(2, "en-US-JennyNeural", True)
+    assert state['prefetch'] is None, "Blank page should not be synthesized"
+    app.schedule_prefetch(4, "en-US-JennyNeural", True)
+    assert state['prefetch'] is None, "Should not prefetch past the last page"
+    print("✅ Test 4 Passed: Nothing to prefetch")
+
+    # Test 5: Re-uploading an edited file with the same name misses old audio
+    app.schedule_prefetch(1, "en-US-JennyNeural", False)
+    state['texts'] = ["Page one text\n1", "Edited page two\n2", "   ", "Page four text\n4"]
+    assert app.take_prefetch(1, "en-US-JennyNeural", False) is None
+    print("✅ Test 5 Passed: Edited text misses the prefetch")
+
+    print("\n🎉 ALL TESTS PASSED! Pre-synthesis hands over the right audio.")
+
+def test_blank_pages_skipped():
+    print("🧪 Starting Blank Page Test...")
+
+    # Page 3 (index 2) is blank, so page 2 is followed by page 4
+    assert app.next_readable_page(1, True) == 3
+    assert app.next_readable_page(3, True) is None, "Nothing follows the last page"
+    app.prefetch_next(1, "en-US-JennyNeural", True)
+    assert state['prefetch']['key'] == app.prefetch_key(3, "en-US-JennyNeural", True)
+    app.prefetch_next(3, "en-US-JennyNeural", True)
+    assert state['prefetch'] is None
+    print("✅ Test Passed: Blank pages are skipped")
+
+def test_drop_stale_prefetch():
+    print("🧪 Starting Stale Prefetch Test...")
+    voice = "en-US-JennyNeural"
+
+    # Test 1: Prefetch for the next readable page survives a rerun on the current page
+    app.prefetch_next(1, voice, True)
+    app.drop_stale_prefetch(1, voice, True, continuous=True)
+    assert state['prefetch'] is not None
+    print("✅ Test 1 Passed: Next page prefetch kept")
+
+    # Test 2: Stepping onto the prefetched page keeps it for Read Page
+    app.drop_stale_prefetch(3, voice, True, continuous=True)
+    assert state['prefetch'] is not None
+    print("✅ Test 2 Passed: Current page prefetch kept")
+
+    # Test 3: Jumping elsewhere cancels it
+    app.drop_stale_prefetch(0, voice, True, continuous=True)
+    assert state['prefetch'] is None
+    print("✅ Test 3 Passed: Jump cancels prefetch")
+
+    # Test 4: Changing voice or cleaning cancels it
+    app.prefetch_next(1, voice, True)
+    app.drop_stale_prefetch(1, "en-US-GuyNeural", True, continuous=True)
+    assert state['prefetch'] is None
+    app.prefetch_next(1, voice, True)
+    app.drop_stale_prefetch(1, voice, False, continuous=True)
+    assert state['prefetch'] is None
+    print("✅ Test 4 Passed: Voice/settings change cancels prefetch")
+
+    # Test 5: Turning continuous reading off cancels it
+    app.prefetch_next(1, voice, True)
+    app.drop_stale_prefetch(1, voice, True, continuous=False)
+    assert state['prefetch'] is None
+    print("✅ Test 5 Passed: Leaving continuous mode cancels prefetch")
+
+def test_jump_to_chapter():
+    print("🧪 Starting Chapter Jump Test...")
+    chapter_map = {"Intro (Pg 1)": 0, "Part Two (Pg 4)": 3}
+    state['page'] = 1
+    state['audio_data'] = b"audio"
+
+    # Test 1: Picking a chapter jumps once and resets the picker
+    state['nav_chapter'] = "Part Two (Pg 4)"
+    app.jump_to_chapter(chapter_map)
+    assert state['page'] == 3 and state['audio_data'] is None
+    assert state['nav_chapter'] == app.CHAPTER_PLACEHOLDER
+    print("✅ Test 1 Passed: Chapter jump")
+
+    # Test 2: Later page changes (e.g. continuous reading) are not pulled back
+    state['page'] = 2
+    state['audio_data'] = b"audio"
+    app.jump_to_chapter(chapter_map)
+    assert state['page'] == 2 and state['audio_data'] == b"audio"
+    print("✅ Test 2 Passed: Placeholder does not move the page")
+
+def test_prefetch_starts_when_enabled_mid_page():
+    print("🧪 Starting Continuous Enable Test...")
+    voice = "en-US-JennyNeural"
+    state['page'] = 0
+    state['audio_data'] = b"page one audio"
+    state['reading_page'] = 1
+
+    # Continuous mode off: nothing is prepared
+    app.ensure_prefetch(0, voice, True, continuous=False)
+    assert state['prefetch'] is None
+
+    # Turning it on while page 1 plays prepares page 2 straight away
+    app.ensure_prefetch(0, voice, True, continuous=True)
+    assert state['prefetch']['key'] == app.prefetch_key(1, voice, True)
+    pending = state['prefetch']
+    app.ensure_prefetch(0, voice, True, continuous=True)
+    assert state['prefetch'] is pending, "Pending prefetch should not be restarted"
+    print("✅ Test Passed: Prefetch starts when continuous reading is enabled")
+
+def test_browser_chaining():
+    print("🧪 Starting Browser Chaining Test...")
+    voice = "en-US-JennyNeural"
+    state['page'] = 0
+    state['audio_data'] = b"page one audio"
+    state['reading_page'] = 1
+
+    # Test 1: The player gets the next page only once it is ready
+    app.prefetch_next(0, voice, True)
+    state['prefetch']['future'].result()
+    tracks = app.continuous_tracks(0, "Page")
+    assert [t['label'] for t in tracks] == ["Page 1", "Page 2"]
+    assert tracks[0]['src'].startswith("data:audio/mpeg;base64,")
+    print("✅ Test 1 Passed: Next page queued in the browser")
+
+    # Test 2: When the browser moves on, the server follows with the same audio
+    next_id = tracks[1]['id']
+    app.advance_continuous(voice, True)
+    assert state['page'] == 1 and state['reading_page'] == 2
+    assert app.audio_track(state['audio_data'], "Page 2")['id'] == next_id, "Player would restart the page"
+    assert len(calls) == 1, "Prefetched audio should be reused"
+    print("✅ Test 2 Passed: Server follows the browser")
+
+    # Test 3: The page after that skips the blank page and is prefetched
+    assert state['prefetch']['page'] == 3
+    print("✅ Test 3 Passed: Following page prefetched")